@@ -1,9 +1,12 @@
 from abc import ABC, abstractmethod, abstractproperty
 from dataclasses import dataclass
+from functools import cached_property
 
 import numpy.typing as npt
 import numpy as np
 
+from . import utils
+
 # @dataclass
 # class StopSequence:
 #     stops: list[int]
@@ -38,20 +41,25 @@ class Service(ABC):
     def _invehicle_flow_indices(self) -> list[int]:
         raise NotImplementedError()
 
+    @property
+    def stops_arr(self) -> npt.NDArray[np.intp]:
+        return np.asarray(self.stops, dtype=np.intp)
+
     @property
     def nbuses(self) -> int:
         return self._nbuses
 
     @property
     def trip_time(self) -> float:
-        return sum(
-            self._travel_time[from_][to_]
-            for from_, to_ in zip(self.stops[:-1], self.stops[1:])
-        )
+        return utils.trip_time(self._travel_time, self.stops_arr)
+
+    @property
+    def _inv_trip_time(self) -> float:
+        return 1.0 / self.trip_time
 
     @property
     def frequency(self) -> float:
-        return self.nbuses / self.trip_time
+        return self.nbuses * self._inv_trip_time
 
     @property
     def max_load(self) -> float:
@@ -81,7 +89,8 @@ class Service(ABC):
         nstops = self.stops[-1] + 1
         out = np.zeros((nstops, nstops), dtype=np.float32)
         values = flow[self._invehicle_flow_indices]
-        indices = np.array(self.stops[:-1]) * nstops + np.array(self.stops[1:])
+        stops = self.stops_arr
+        indices = stops[:-1] * nstops + stops[1:]
         out.put(indices, values)
 
         return out
@@ -98,11 +107,24 @@ class AllStopService(Service):
         super().__init__(*args, **kwargs)
 
         self._stops = list(range(self._nstops))
+        self._stops_arr = np.arange(self._nstops, dtype=np.intp)
 
     @property
     def stops(self) -> list[int]:
         return self._stops
 
+    @property
+    def stops_arr(self) -> npt.NDArray[np.intp]:
+        return self._stops_arr
+
+    @cached_property
+    def trip_time(self) -> float:  # type: ignore
+        return super().trip_time
+
+    @cached_property
+    def _inv_trip_time(self) -> float:  # type: ignore
+        return super()._inv_trip_time
+
     def is_serving(self, stop: int) -> bool:
         return stop < self._nstops
 
@@ -120,9 +142,39 @@ class LimitedStopService(Service):
 
         self._stops_binary = [False for stop in range(self._nstops)]
 
+        # Derived from _stops_binary, rebuilt lazily after each toggle
+        self._stops: list[int] | None = None
+        self._stops_arr: npt.NDArray[np.intp] | None = None
+        self._trip_time: float | None = None
+        self._recip_trip_time: float | None = None
+
     @property
     def stops(self) -> list[int]:
-        return [i for i, served in enumerate(self._stops_binary) if served]
+        if self._stops is None:
+            self._stops = [i for i, served in enumerate(self._stops_binary) if served]
+
+        return self._stops
+
+    @property
+    def stops_arr(self) -> npt.NDArray[np.intp]:
+        if self._stops_arr is None:
+            self._stops_arr = np.asarray(self.stops, dtype=np.intp)
+
+        return self._stops_arr
+
+    @property
+    def trip_time(self) -> float:
+        if self._trip_time is None:
+            self._trip_time = super().trip_time
+
+        return self._trip_time
+
+    @property
+    def _inv_trip_time(self) -> float:
+        if self._recip_trip_time is None:
+            self._recip_trip_time = 1.0 / self.trip_time
+
+        return self._recip_trip_time
 
     @property
     def stops_binary(self) -> list[bool]:
@@ -136,6 +188,10 @@ class LimitedStopService(Service):
 
     def toggle(self, stop: int) -> None:
         self._stops_binary[stop] = False if self._stops_binary[stop] else True
+        self._stops = None
+        self._stops_arr = None
+        self._trip_time = None
+        self._recip_trip_time = None
 
         if stop >= self._last_stop:
             if self._stops_binary[stop]:
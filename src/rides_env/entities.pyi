@@ -1,7 +1,9 @@
 import abc
 from abc import ABC, abstractmethod
 from dataclasses import dataclass as dataclass
+from functools import cached_property
 
+import numpy as np
 import numpy.typing as npt
 
 class Service(ABC, metaclass=abc.ABCMeta):
@@ -14,6 +16,8 @@ class Service(ABC, metaclass=abc.ABCMeta):
     @abc.abstractproperty
     def _invehicle_flow_indices(self) -> list[int]: ...
     @property
+    def stops_arr(self) -> npt.NDArray[np.intp]: ...
+    @property
     def nbuses(self) -> int: ...
     @property
     def trip_time(self) -> float: ...
@@ -34,6 +38,8 @@ class AllStopService(Service):
     def __init__(self, *args, **kwargs) -> None: ...
     @property
     def stops(self) -> list[int]: ...
+    @cached_property
+    def trip_time(self) -> float: ...
     def is_serving(self, stop: int) -> bool: ...
     def not_serving_any_stops(self) -> bool: ...
     def remove_bus(self) -> None: ...
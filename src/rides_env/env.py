@@ -413,8 +413,10 @@ class RidesEnv(Env):
         return self._nstops_max + 2
 
     def _pad(self, mat: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        # Always hand out an owned copy, solution arrays may be read-only views
+        # of the cached assignment results
         if mat.shape == (self._nstops_max,) * mat.ndim:
-            return mat
+            return mat.copy()
 
         pad_width = self._nstops_max - mat.shape[0]
         return np.pad(mat, ((0, pad_width),) * mat.ndim)
@@ -1,10 +1,10 @@
 import hashlib
+from collections import OrderedDict
 from math import ceil, floor
 from typing import Annotated
 
 import numpy as np
 import numpy.typing as npt
-from scipy.stats import multivariate_normal  # type: ignore
 
 from tram import mat_linear_assign, mat_linear_congested_assign
 
@@ -13,6 +13,32 @@ from .network import SGNetwork
 from .utils import calculate_stats, trip_time
 
 
+def _gaussian_pdf(
+    pos: npt.NDArray[np.floating],
+    mean: npt.ArrayLike,
+    cov: npt.NDArray[np.floating],
+) -> npt.NDArray[np.floating]:
+    # Evaluates k gaussians with means (k, d) and covariances (k, d, d) on the
+    # points pos (..., d), returning densities of shape (k, ...)
+    #
+    # The covariances must be positive definite. Unlike scipy's
+    # multivariate_normal(allow_singular=True), a zero-variance peak (e.g.
+    # demand_peak_conc=inf) raises np.linalg.LinAlgError
+    mean = np.asarray(mean, dtype=np.float64)
+    nkernels, ndim = mean.shape
+
+    chol = np.linalg.cholesky(cov)
+    dev = pos.reshape(1, -1, ndim) - mean[:, np.newaxis, :]
+    z = np.linalg.solve(chol, dev.transpose(0, 2, 1))
+    inv_norm = 1.0 / (
+        (2 * np.pi) ** (ndim / 2) * np.prod(np.diagonal(chol, axis1=1, axis2=2), axis=1)
+    )
+
+    pdf = np.exp(-0.5 * (z * z).sum(axis=1)) * inv_norm[:, np.newaxis]
+
+    return pdf.reshape(nkernels, *pos.shape[:-1])
+
+
 class LSSDPInstance:
     def __init__(
         self,
@@ -44,6 +70,9 @@ class LSSDPInstance:
 
         self._id: str = ""
 
+        # Assignment results of LSSDPSolution states, freed with the instance
+        self._assign_cache: OrderedDict[tuple, tuple] = OrderedDict()
+
     def visualise(self) -> None:
         import math
 
@@ -52,10 +81,6 @@ class LSSDPInstance:
         from mpl_toolkits.axes_grid1.axes_divider import \
             make_axes_locatable  # type: ignore
 
-        def nanlower(arr):
-            arr[np.tril_indices(arr.shape[0])] = np.nan
-            return arr
-
         plt.rcParams.update(
             {
                 "image.cmap": "RdYlBu",
@@ -95,6 +120,8 @@ class LSSDPInstance:
         nstops = demand.shape[0]
         n_intervals = math.ceil(nstops / interval)
 
+        lower = np.tri(nstops, dtype=bool)
+
         dep.plot(demand_dep, range(nstops - 1, -1, -1))
         dep.set_ylim(-0.5, nstops - 0.5)
         dep.set_xlim(0, demand_max)
@@ -103,7 +130,11 @@ class LSSDPInstance:
         arr.set_xlim(-0.5, nstops - 0.5)
         arr.set_ylim(0, demand_max)
 
-        dem.imshow(nanlower(demand.copy()), cmap="OrRd", vmin=0)
+        dem.imshow(
+            np.where(lower, np.nan, demand.astype(np.float32, copy=False)),
+            cmap="OrRd",
+            vmin=0,
+        )
         _ = dem.set_title("Demand", y=-0.1)
         _ = dem.set_xticks(np.arange(-0.5, n_intervals * interval - 0.5, interval))
         _ = dem.set_yticks(np.arange(-0.5, n_intervals * interval - 0.5, interval))
@@ -118,7 +149,11 @@ class LSSDPInstance:
                 verticalalignment="center",
             )
 
-        tt.imshow(nanlower(self.travel_time.copy()), cmap="OrRd", vmin=0)
+        tt.imshow(
+            np.where(lower, np.nan, self.travel_time.astype(np.float32, copy=False)),
+            cmap="OrRd",
+            vmin=0,
+        )
         _ = tt.set_title("Travel time", y=-0.1)
         _ = tt.set_xticks(np.arange(-0.5, n_intervals * interval - 0.5, interval))
         _ = tt.set_yticks(np.arange(-0.5, n_intervals * interval - 0.5, interval))
@@ -138,13 +173,35 @@ class LSSDPInstance:
     def calculate_id(self) -> None:
         h = hashlib.sha256()
 
-        h.update(str(hash(tuple(self.travel_time.flatten().tolist()))).encode("utf8"))
-        h.update(str(hash(tuple(self.demand.flatten().tolist()))).encode("utf8"))
+        h.update(np.ascontiguousarray(self.travel_time).tobytes())
+        h.update(np.ascontiguousarray(self.demand).tobytes())
         h.update(str(self.nbuses).encode("utf8"))
         h.update(str(self.capacity).encode("utf8"))
 
         self._id = h.hexdigest()[:10]
 
+    def calculate_base(self) -> None:
+        if self.congested:
+            out = mat_linear_congested_assign(
+                [self._oris.stops],
+                [self._oris.frequency],
+                self.travel_time,
+                self.demand,
+                self.capacity,
+                max_iters=self.max_iters,
+            )
+        else:
+            out = mat_linear_assign(
+                [self._oris.stops],
+                [self._oris.frequency],
+                self.travel_time,
+                self.demand,
+            )
+
+        self.base_ttd = np.asarray(out[0], dtype=np.float32)
+        self.base_flow = np.asarray(out[1], dtype=np.float32)
+        self.base_obj = out[2]
+
     def print_summary(self) -> None:
         if self.congested:
             congested_str = "\033[32mTrue\033[0m"
@@ -177,7 +234,7 @@ class LSSDPInstance:
                 *calculate_stats(self.base_ttd),
                 *calculate_stats(
                     (
-                        (self.base_flow / (self._oris.frequency * self.capacity) * 100)
+                        self.base_flow * (100 / (self._oris.frequency * self.capacity))
                         if self.congested
                         else [float("nan")]
                     ),
@@ -220,10 +277,14 @@ class LSSDPInstance:
                 nstops[0], max_num_nodes=nstops[1], truncate=truncate, rng=rng
             )
 
-        travel_time = np.triu(distance / speed / 1000 * 60 + dwell_time, 1)
+        travel_time = np.triu(
+            distance.astype(np.float32, copy=False) * np.float32(60 / speed / 1000)
+            + np.float32(dwell_time),
+            1,
+        )
         inst_nstops = travel_time.shape[0]
 
-        ass_trip_time = trip_time(travel_time, list(range(inst_nstops)))
+        ass_trip_time = trip_time(travel_time, np.arange(inst_nstops))
 
         min_nbuses = ceil(ass_trip_time / max_headway)
         max_nbuses = floor(ass_trip_time / min_headway) + 1
@@ -245,34 +306,43 @@ class LSSDPInstance:
         demand = rng.random(size=(inst_nstops, inst_nstops))
 
         if demand_npeaks_max > 1:
-            for _ in range(rng.integers(1, high=demand_npeaks_max + 1)):
-                mean = sorted(rng.integers(1, high=inst_nstops + 1, size=(2,)))
-                var = np.diag(rng.random(size=(2,)) * inst_nstops / demand_peak_conc)
-
-                x, y = np.mgrid[1 : inst_nstops + 1, 1 : inst_nstops + 1]
-                pos = np.dstack((x, y))
-
-                rv = multivariate_normal(mean, var, allow_singular=True)
-                demand += rng.random() * rv.pdf(pos) * demand_peak_size
+            npeaks = rng.integers(1, high=demand_npeaks_max + 1)
+            means = np.empty((npeaks, 2))
+            vars_ = np.empty((npeaks, 2, 2))
+            weights = np.empty(npeaks)
+
+            for i in range(npeaks):
+                means[i] = sorted(rng.integers(1, high=inst_nstops + 1, size=(2,)))
+                vars_[i] = np.diag(
+                    rng.random(size=(2,)) * inst_nstops / demand_peak_conc
+                )
+                weights[i] = rng.random()
+
+            x, y = np.mgrid[1 : inst_nstops + 1, 1 : inst_nstops + 1]
+            pos = np.dstack((x, y))
+
+            demand += (
+                np.einsum("k,kij->ij", weights, _gaussian_pdf(pos, means, vars_))
+                * demand_peak_size
+            )
 
         demand = np.triu(demand, 1)
 
         if congested:
             demand /= inst_nstops + 1 - np.arange(inst_nstops).reshape(-1, 1)
-            demand /= np.sum(demand)
             demand *= (
                 inst_nbuses
                 / ass_trip_time
                 * capacity
                 * (rng.random() * demand_factor * 15 / 4 + demand_factor / 4)
                 * (rng.random() * 0.8 + 0.2)
-            )
+            ) / demand.sum()
         else:
             demand /= np.max(demand)
 
         inst = LSSDPInstance(
             stops=stops,
-            travel_time=travel_time.astype(np.float32),
+            travel_time=travel_time,
             demand=demand.astype(np.float32),
             nbuses=inst_nbuses,
             capacity=capacity,
@@ -288,26 +358,7 @@ class LSSDPInstance:
         #     demand,
         # )
 
-        if congested:
-            out = mat_linear_congested_assign(
-                [inst._oris.stops],
-                [inst._oris.frequency],
-                travel_time,
-                demand,
-                capacity,
-                max_iters=max_iters,
-            )
-        else:
-            out = mat_linear_assign(
-                [inst._oris.stops],
-                [inst._oris.frequency],
-                travel_time,
-                demand,
-            )
-
-        inst.base_ttd = np.asarray(out[0], dtype=np.float32)
-        inst.base_flow = np.asarray(out[1], dtype=np.float32)
-        inst.base_obj = out[2]
+        inst.calculate_base()
         inst.name = info["name"]
 
         inst.calculate_id()
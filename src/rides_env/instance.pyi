@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import Annotated
 
 import numpy as np
@@ -20,6 +21,7 @@ class LSSDPInstance:
     max_iters: int
     name: str | None
     _oris: AllStopService
+    _assign_cache: OrderedDict[tuple, tuple]
     def __init__(
         self,
         travel_time: npt.NDArray[np.floating],
@@ -35,6 +37,7 @@ class LSSDPInstance:
     ) -> None: ...
     def visualise(self) -> None: ...
     def calculate_id(self) -> None: ...
+    def calculate_base(self) -> None: ...
     def print_summary(self) -> None: ...
     @property
     def nstops(self) -> int: ...
@@ -1,3 +1,7 @@
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 import numpy as np
 import numpy.typing as npt
 from tram import mat_linear_assign, mat_linear_congested_assign
@@ -6,6 +10,122 @@ from .entities import AllStopService, LimitedStopService
 from .instance import LSSDPInstance
 from .utils import calculate_stats, trip_time
 
+_NAN = np.array([float("nan")], dtype=np.float32)
+_NAN.flags.writeable = False
+
+_AssignResult = tuple[npt.NDArray[np.floating], npt.NDArray[np.floating], float]
+
+_ASSIGN_CACHE_SIZE = 4096
+_assign_cache_lock = threading.Lock()
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_max_workers: int | None = None
+
+
+def set_max_workers(max_workers: int | None) -> None:
+    """Sets the number of threads used by :meth:`LSSDPSolution.submit_objective`.
+
+    ``None`` (the default) uses the cores left free by tram's own rayon pool,
+    which is a single thread unless ``RAYON_NUM_THREADS`` is set. Work that was
+    already submitted still completes on the previous pool.
+    """
+    global _executor, _max_workers
+
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    with _executor_lock:
+        _max_workers = max_workers
+
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _num_workers() -> int:
+    ncpus = os.cpu_count() or 1
+
+    # Every tram solve already runs on a rayon pool that uses all cores unless
+    # RAYON_NUM_THREADS is set, so only add threads for the cores it leaves idle.
+    # Like rayon, treat an empty or invalid value as unset
+    nrayon_env = os.environ.get("RAYON_NUM_THREADS", "").strip()
+    nrayon = int(nrayon_env) if nrayon_env.isdigit() else 0
+    nrayon = nrayon or ncpus
+
+    return max(1, ncpus // nrayon)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_max_workers if _max_workers is not None else _num_workers()
+            )
+
+    return _executor
+
+
+def _assign(
+    inst: LSSDPInstance,
+    lss_stops: tuple[int, ...],
+    frequencies: tuple[float, float],
+) -> _AssignResult:
+    # The all-stop alignment is fixed per instance, so only the limited-stop
+    # alignment needs to be part of the key
+    key = (lss_stops, frequencies)
+    cache = inst._assign_cache
+
+    with _assign_cache_lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+    out = _solve_assignment(inst, lss_stops, frequencies)
+
+    with _assign_cache_lock:
+        cache[key] = out
+
+        if len(cache) > _ASSIGN_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    return out
+
+
+def _solve_assignment(
+    inst: LSSDPInstance,
+    lss_stops: tuple[int, ...],
+    frequencies: tuple[float, float],
+) -> _AssignResult:
+    alignments = [inst._oris.stops, list(lss_stops)]
+
+    if inst.congested:
+        out = mat_linear_congested_assign(
+            alignments,
+            list(frequencies),
+            inst.travel_time,
+            inst.demand,
+            inst.capacity,
+            max_iters=inst.max_iters,
+        )
+    else:
+        out = mat_linear_assign(
+            alignments,
+            list(frequencies),
+            inst.travel_time,
+            inst.demand,
+        )
+
+    # Results are shared between solutions revisiting the same state
+    ttd = np.asarray(out[0], dtype=np.float32)
+    ttd.flags.writeable = False
+    flow = np.asarray(out[1], dtype=np.float32)
+    flow.flags.writeable = False
+
+    return ttd, flow, out[2]
+
 
 class LSSDPSolution:
     def __init__(self, inst: LSSDPInstance) -> None:
@@ -21,20 +141,42 @@ class LSSDPSolution:
         self._ttd = inst.base_ttd
         self._flow = inst.base_flow
 
+        # A new solution starts in the same state as an invalid limited-stop
+        # service, i.e. the base objective, travel times and flows
+        self._was_invalid = True
+
+        # Computed lazily, invalidated whenever the objective changes
+        self._stats: dict[str, tuple[np.floating, ...]] | None = None
+
+        # Set by mutators called with evaluate=False until the objective of the
+        # new state has been written back
+        self._outdated = False
+        self._pending: Future[_AssignResult | None] | None = None
+
     @property
     def _lf(self) -> npt.NDArray[np.floating]:
-        return (
-            np.divide(self._flow, self._capacities)
-            if self._inst.congested
-            else np.array([float("nan")], dtype=np.float32)
-        )
+        if not self._inst.congested:
+            return _NAN
+
+        if not self._lss.is_valid():
+            return np.multiply(
+                self._flow, 1.0 / self._inst._oris.max_load, dtype=np.float64
+            )
+
+        # Load factors have always been float64, even though flows are float32
+        k = 3 * (self._ass.nstops - 1)
+        lf = np.empty(self._flow.shape, dtype=np.float64)
+        np.multiply(self._flow[:k], 1.0 / self._ass.max_load, out=lf[:k])
+        np.multiply(self._flow[k:], 1.0 / self._lss.max_load, out=lf[k:])
+
+        return lf
 
     @property
     def _ass_load_factor(self) -> npt.NDArray[np.floating]:
         return (
             self._ass.convert_invehicle_flow_to_mat(self._lf)
             if self._inst.congested
-            else np.array([float("nan")], dtype=np.float32)
+            else _NAN
         )
 
     @property
@@ -42,7 +184,7 @@ class LSSDPSolution:
         return (
             self._lss.convert_invehicle_flow_to_mat(self._lf)
             if self._inst.congested
-            else np.array([float("nan")], dtype=np.float32)
+            else _NAN
         )
 
     @property
@@ -53,20 +195,18 @@ class LSSDPSolution:
     def _lss_flow_mat(self) -> npt.NDArray[np.floating]:
         return self._lss.convert_invehicle_flow_to_mat(self._flow)
 
-    @property
-    def _capacities(self) -> npt.NDArray[np.floating]:
-        if not self._lss.is_valid():
-            return np.array([self._inst._oris.max_load] * 3 * (self._inst.nstops - 1))
-
-        return np.array(
-            ([self._ass.max_load] * 3 * (self._ass.nstops - 1))
-            + ([self._lss.max_load] * 3 * (self._lss.nstops - 1))
-        )
-
     @property
     def stats(
         self,
     ) -> dict[str, tuple[np.floating, np.floating, np.floating, np.floating]]:
+        if self._outdated:
+            raise RuntimeError("Objective has not been evaluated since last change")
+
+        # The cached tuples are immutable, a shallow copy keeps callers from
+        # corrupting the cache through the returned dict
+        if self._stats is not None:
+            return dict(self._stats)
+
         if not self._lss.is_valid():
             per_flow_exp = 0.0
         else:
@@ -74,58 +214,119 @@ class LSSDPSolution:
                 self._flow[3 * (self._ass.nstops - 1) :].sum() / self._flow.sum()
             )
 
-        return {
+        self._stats = {
             "ttd": calculate_stats(self._ttd),
             "lf": calculate_stats(self._lf),
             "per_flow_exp": calculate_stats([per_flow_exp]),
         }
 
+        return dict(self._stats)
+
     def terminate(self) -> None:
         self._prev_obj = self._obj
 
-    def toggle(self, stop: int) -> None:
+    def toggle(self, stop: int, evaluate: bool = True) -> None:
         self._lss.toggle(stop)
-        self._calculate_objective()
+        self._changed(evaluate)
 
-    def add_bus(self) -> None:
+    def add_bus(self, evaluate: bool = True) -> None:
         self._ass.remove_bus()
         self._lss.add_bus()
-        self._calculate_objective()
+        self._changed(evaluate)
 
-    def remove_bus(self) -> None:
+    def remove_bus(self, evaluate: bool = True) -> None:
         self._ass.add_bus()
         self._lss.remove_bus()
-        self._calculate_objective()
+        self._changed(evaluate)
 
-    def _calculate_objective(self) -> None:
+    def submit_objective(self) -> Future[_AssignResult | None]:
+        """Solves the assignment for the current state on a worker thread.
+
+        Used together with ``evaluate=False`` on the mutators to evaluate many
+        solutions in parallel. The solution must not be modified until the
+        result is written back by :meth:`finalize`.
+
+        tram parallelises each solve across all cores by default, so batches
+        only run concurrently when ``RAYON_NUM_THREADS`` is set below the
+        number of cores before tram is first used, or when the pool is sized
+        explicitly with :func:`set_max_workers`.
+        """
+        self._pending = _get_executor().submit(self._solve)
+
+        return self._pending
+
+    @staticmethod
+    def finalize(solutions: list["LSSDPSolution"]) -> None:
+        """Waits for the submitted objectives and writes them back.
+
+        Every successful result is written back before the first exception
+        raised by a solve, if any, is re-raised.
+        """
+        error: BaseException | None = None
+
+        for sol in solutions:
+            if sol._pending is None:
+                continue
+
+            future, sol._pending = sol._pending, None
+
+            try:
+                out = future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+
+                continue
+
+            sol._update_objective(out)
+
+        if error is not None:
+            raise error
+
+    def _changed(self, evaluate: bool) -> None:
+        self._stats = None
+
+        if evaluate:
+            self._calculate_objective()
+        else:
+            self._outdated = True
+
+    def _solve(self) -> _AssignResult | None:
         if not self._lss.is_valid():
+            return None
+
+        return _assign(
+            self._inst,
+            tuple(self._lss.stops),
+            (self._ass.frequency, self._lss.frequency),
+        )
+
+    def _calculate_objective(self) -> None:
+        self._update_objective(self._solve())
+
+    def _update_objective(self, out: _AssignResult | None) -> None:
+        self._outdated = False
+
+        if out is None:
             self._prev_obj = self._obj
+
+            if self._was_invalid:
+                return
+
+            self._was_invalid = True
+            self._stats = None
             self._obj = 1.0
             self._ttd = self._inst.base_ttd
+            self._flow = self._inst.base_flow
 
             return
 
-        alignments = [self._ass.stops, self._lss.stops]
-        frequencies = [self._ass.frequency, self._lss.frequency]
-
-        if self._inst.congested:
-            out = mat_linear_congested_assign(
-                alignments,
-                frequencies,
-                self._inst.travel_time,
-                self._inst.demand,
-                self._inst.capacity,
-                max_iters=self._inst.max_iters,
-            )
-        else:
-            out = mat_linear_assign(
-                alignments,
-                frequencies,
-                self._inst.travel_time,
-                self._inst.demand,
-            )
+        self._was_invalid = False
+        self._stats = None
+
+        ttd, flow, obj = out
 
         self._prev_obj = self._obj
-        self._obj = out[2] / self._inst.base_obj
-        self._ttd = np.asarray(out[0], dtype=np.float32)
-        self._flow = np.asarray(out[1], dtype=np.float32)
+        self._obj = obj / self._inst.base_obj
+        self._ttd = ttd
+        self._flow = flow
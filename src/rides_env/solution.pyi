@@ -1,3 +1,5 @@
+from concurrent.futures import Future
+
 import numpy as np
 import numpy.typing as npt
 
@@ -7,6 +9,8 @@ from .instance import LSSDPInstance as LSSDPInstance
 from .utils import calculate_stats as calculate_stats
 from .utils import trip_time as trip_time
 
+def set_max_workers(max_workers: int | None) -> None: ...
+
 class LSSDPSolution:
     _inst: LSSDPInstance
     _ass: AllStopService
@@ -21,5 +25,12 @@ class LSSDPSolution:
         self,
     ) -> dict[str, tuple[np.floating, np.floating, np.floating, np.floating]]: ...
     def terminate(self) -> None: ...
-    def toggle(self, stop: int) -> None: ...
-    def add_bus(self) -> None: ...
+    def toggle(self, stop: int, evaluate: bool = True) -> None: ...
+    def add_bus(self, evaluate: bool = True) -> None: ...
+    def submit_objective(
+        self,
+    ) -> Future[
+        tuple[npt.NDArray[np.floating], npt.NDArray[np.floating], float] | None
+    ]: ...
+    @staticmethod
+    def finalize(solutions: list[LSSDPSolution]) -> None: ...
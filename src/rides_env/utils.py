@@ -1,25 +1,44 @@
+from functools import lru_cache
+
 import numpy as np
 import numpy.typing as npt
 
 
+@lru_cache(maxsize=16)
+def _triu_mask(n: int) -> npt.NDArray[np.bool_]:
+    mask = ~np.tri(n, dtype=bool)
+    mask.flags.writeable = False
+
+    return mask
+
+
 def calculate_stats(
     arr: npt.ArrayLike, sum: bool = True
 ) -> tuple[np.floating, np.floating, np.floating, np.floating]:
-    arr = np.array(arr)
+    if not isinstance(arr, np.ndarray):
+        arr = np.array(arr)
+
+    if arr.ndim <= 1 and arr.size == 1:
+        value = arr.reshape(-1)[0]
+        return value, value, value, value if sum else float("nan")
 
     values = (
-        arr[np.triu_indices_from(arr, k=1)]
+        arr[_triu_mask(arr.shape[0])]
         if arr.ndim == 2 and arr.shape[0] == arr.shape[1]
         else arr
     )
 
     return (
-        np.min(values),
-        np.mean(values),
-        np.max(values),
-        np.sum(values) if sum else float("nan"),
+        values.min(),
+        values.mean(),
+        values.max(),
+        values.sum() if sum else float("nan"),
     )
 
 
-def trip_time(travel_time: npt.NDArray, stops: list[int]) -> float:
-    return sum(travel_time[from_][to_] for from_, to_ in zip(stops[:-1], stops[1:]))
+def trip_time(
+    travel_time: npt.NDArray, stops: list[int] | npt.NDArray[np.integer]
+) -> float:
+    s = np.asarray(stops, dtype=np.intp)
+
+    return float(travel_time[s[:-1], s[1:]].sum())
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from rides_env.instance import LSSDPInstance
+from rides_env.solution import LSSDPSolution
+
+
+def make_instance(congested: bool, nstops: int = 12) -> LSSDPInstance:
+    rng = np.random.default_rng(0)
+
+    position = np.cumsum(rng.random(nstops) * 2 + 1)
+    travel_time = np.triu(np.abs(position - position[:, np.newaxis]) + 0.5, 1)
+    demand = np.triu(rng.random((nstops, nstops)), 1)
+
+    inst = LSSDPInstance(
+        stops=[str(i) for i in range(nstops)],
+        travel_time=travel_time.astype(np.float32),
+        demand=demand.astype(np.float32),
+        nbuses=10,
+        capacity=90.0,
+        congested=congested,
+    )
+
+    inst.calculate_base()
+    inst.calculate_id()
+
+    return inst
+
+
+@pytest.mark.parametrize("congested", [False, True])
+def test_batched_objective_matches_sync(congested: bool):
+    inst = make_instance(congested)
+    actions = [[0, 3, 7], [1, 4, 5, 11], [2, 9], [6]]
+
+    sync = [LSSDPSolution(inst) for _ in actions]
+    for sol, stops in zip(sync, actions):
+        for stop in stops:
+            sol.toggle(stop)
+        sol.add_bus()
+
+    batched = [LSSDPSolution(inst) for _ in actions]
+    for sol, stops in zip(batched, actions):
+        for stop in stops:
+            sol.toggle(stop, evaluate=False)
+        sol.add_bus(evaluate=False)
+        sol.submit_objective()
+
+    LSSDPSolution.finalize(batched)
+
+    for a, b in zip(sync, batched):
+        assert b._obj == a._obj
+        np.testing.assert_array_equal(b._ttd, a._ttd)
+        np.testing.assert_array_equal(b._flow, a._flow)
+        np.testing.assert_equal(b.stats, a.stats)
+
+
+def test_stats_unavailable_until_evaluated():
+    inst = make_instance(congested=True)
+    sol = LSSDPSolution(inst)
+    sol.toggle(0)
+    sol.toggle(4)
+    stats = sol.stats
+
+    sol.toggle(8, evaluate=False)
+    with pytest.raises(RuntimeError):
+        sol.stats
+
+    sol.submit_objective()
+    LSSDPSolution.finalize([sol])
+    assert sol.stats != stats